@@ -1,211 +1,388 @@
+import warnings
 import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
 from io import BytesIO, StringIO
 
+try:
+    import pyarrow
+    CSV_ENGINE = 'pyarrow'
+    CSV_ENGINE_ERRORS = (pd.errors.ParserError, pyarrow.ArrowInvalid)
+except ImportError:
+    CSV_ENGINE = 'c'
+    CSV_ENGINE_ERRORS = ()
+
 st.set_page_config(page_title="Lipid-Gene Sankey Analysis", layout="wide")
 
-st.title("Lipid-Gene Sankey Diagram Generator")
-st.markdown("**White vs Beige Adipocyte Analysis**")
+# Node colors
+DIR_COLOR = {
+    'Upregulated_White': 'rgba(255, 99, 71, 0.8)',
+    'Downregulated_White': 'rgba(70, 130, 180, 0.8)'
+}
+CLASS_COLOR = {
+    'PC': 'rgba(255, 165, 0, 0.8)',
+    'LPC': 'rgba(255, 165, 0, 0.8)',
+    'PE': 'rgba(255, 165, 0, 0.8)',
+    'LPE': 'rgba(255, 165, 0, 0.8)',
+    'DG': 'rgba(34, 139, 34, 0.8)',
+    'TG': 'rgba(34, 139, 34, 0.8)',
+    'SM': 'rgba(148, 0, 211, 0.8)',
+    'CAR': 'rgba(148, 0, 211, 0.8)'
+}
+DEFAULT_NODE_COLOR = 'rgba(128, 128, 128, 0.8)'
 
-# Sidebar for file uploads
-st.sidebar.header("Upload Data Files")
 
-transcriptome_file = st.sidebar.file_uploader("Upload Transcriptome CSV", type=['csv'])
-lipid_file = st.sidebar.file_uploader("Upload Lipid Data CSV", type=['csv'])
+def read_csv_bytes(file_bytes):
+    """Parse CSV bytes, preferring the pyarrow engine and falling back to the C engine."""
+    if CSV_ENGINE == 'pyarrow':
+        try:
+            df = pd.read_csv(BytesIO(file_bytes), engine='pyarrow')
+        except CSV_ENGINE_ERRORS:
+            # e.g. short rows, which the C engine pads with NaN
+            pass
+        else:
+            # The C engine renames duplicate headers to A.1, A.2, ... and empty ones
+            # (e.g. R write.csv's ID column) to 'Unnamed: N'; pyarrow keeps them as is
+            if not df.columns.has_duplicates and not (df.columns == '').any():
+                return df
+    return pd.read_csv(BytesIO(file_bytes))
 
-# Parameters
-st.sidebar.header("Analysis Parameters")
-gene_fc_threshold = st.sidebar.slider("Gene log2FC Threshold", 0.5, 3.0, 1.5, 0.1)
-lipid_fc_threshold = st.sidebar.slider("Lipid log2FC Threshold", 0.1, 2.0, 0.8, 0.1)
-top_genes_count = st.sidebar.slider("Top Genes to Display", 10, 100, 40, 5)
 
-# Column name inputs
-st.sidebar.header("Column Names")
-beige_gene_prefix = st.sidebar.text_input("Beige Gene Column Prefix", "Hannah_Beige_")
-white_gene_prefix = st.sidebar.text_input("White Gene Column Prefix", "Hannah_White_")
-beige_lipid_prefix = st.sidebar.text_input("Beige Lipid Column Prefix", "Beige_")
-white_lipid_prefix = st.sidebar.text_input("White Lipid Column Prefix", "White_")
-gene_id_col = st.sidebar.text_input("Gene ID Column", "SampleID")
-lipid_id_col = st.sidebar.text_input("Lipid ID Column", "Metabolite")
+def split_sample_columns(columns, beige_prefix, white_prefix):
+    """Return (beige_cols, white_cols) for the given prefixes in a single pass over columns."""
+    beige_cols, white_cols = [], []
+    for c in columns:
+        if c.startswith(beige_prefix):
+            beige_cols.append(c)
+        if c.startswith(white_prefix):
+            white_cols.append(c)
+    return beige_cols, white_cols
 
-if transcriptome_file and lipid_file:
-    # Load data
-    transcriptome = pd.read_csv(transcriptome_file)
-    lipid_data = pd.read_csv(lipid_file)
+
+@st.cache_data(max_entries=4)
+def load_transcriptome(file_bytes: bytes, id_col, beige_prefix, white_prefix):
+    """Load and clean the transcriptome CSV and compute per-gene log2FC."""
+    transcriptome = read_csv_bytes(file_bytes)
     
     # Clean transcriptome
-    transcriptome = transcriptome[transcriptome[gene_id_col] != 'Class']
-    transcriptome = transcriptome[transcriptome[gene_id_col].notna()]
+    ids = transcriptome[id_col]
+    transcriptome = transcriptome.loc[ids.notna() & (ids != 'Class')]
+    
+    # Find columns
+    beige_cols, white_cols = split_sample_columns(transcriptome.columns, beige_prefix, white_prefix)
+    
+    # Process genes
+    sample_cols = beige_cols + white_cols
+    sample_block = transcriptome[sample_cols].apply(pd.to_numeric, errors='coerce').to_numpy(np.float32)
+    transcriptome[sample_cols] = sample_block
+    beige_block = sample_block[:, :len(beige_cols)]
+    white_block = sample_block[:, len(beige_cols):]
+    
+    # All-NaN rows (or a prefix matching no columns) give NaN silently, like DataFrame.mean
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        beige_mean = np.nanmean(beige_block, axis=1)
+        white_mean = np.nanmean(white_block, axis=1)
+    transcriptome['Beige_Mean'] = beige_mean
+    transcriptome['White_Mean'] = white_mean
+    transcriptome['Gene_log2FC'] = np.log2((white_mean + 1) / (beige_mean + 1))
+    
+    return transcriptome, beige_cols, white_cols
+
+
+@st.cache_data(max_entries=4)
+def load_lipids(file_bytes: bytes, id_col, beige_prefix, white_prefix):
+    """Load and clean the lipid CSV and compute per-lipid log2FC and class."""
+    lipid_data = read_csv_bytes(file_bytes)
     
     # Clean lipid data
-    lipid_data = lipid_data[lipid_data[lipid_id_col] != 'Label']
-    lipid_data = lipid_data[lipid_data[lipid_id_col] != 'Metabolite']
-    lipid_data = lipid_data[lipid_data[lipid_id_col].notna()]
+    ids = lipid_data[id_col]
+    lipid_data = lipid_data.loc[ids.notna() & ~ids.isin(('Label', 'Metabolite'))]
     
     # Find columns
-    beige_gene_cols = [c for c in transcriptome.columns if c.startswith(beige_gene_prefix)]
-    white_gene_cols = [c for c in transcriptome.columns if c.startswith(white_gene_prefix)]
-    beige_lipid_cols = [c for c in lipid_data.columns if c.startswith(beige_lipid_prefix)]
-    white_lipid_cols = [c for c in lipid_data.columns if c.startswith(white_lipid_prefix)]
+    beige_cols, white_cols = split_sample_columns(lipid_data.columns, beige_prefix, white_prefix)
     
-    st.success("Files loaded successfully!")
+    # Process lipids
+    sample_cols = beige_cols + white_cols
+    sample_block = lipid_data[sample_cols].apply(pd.to_numeric, errors='coerce').to_numpy(np.float32)
+    lipid_data[sample_cols] = sample_block
+    beige_block = sample_block[:, :len(beige_cols)]
+    white_block = sample_block[:, len(beige_cols):]
     
-    col1, col2 = st.columns(2)
-    with col1:
-        st.metric("Genes", len(transcriptome))
-        st.metric("Beige Gene Samples", len(beige_gene_cols))
-        st.metric("White Gene Samples", len(white_gene_cols))
-    with col2:
-        st.metric("Lipids", len(lipid_data))
-        st.metric("Beige Lipid Samples", len(beige_lipid_cols))
-        st.metric("White Lipid Samples", len(white_lipid_cols))
+    # All-NaN rows (or a prefix matching no columns) give NaN silently, like DataFrame.mean
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        beige_mean = np.nanmean(beige_block, axis=1)
+        white_mean = np.nanmean(white_block, axis=1)
+    lipid_data['Beige_Mean'] = beige_mean
+    lipid_data['White_Mean'] = white_mean
+    lipid_data['Lipid_log2FC'] = np.log2((white_mean + 1) / (beige_mean + 1))
+    lipid_data['Lipid_Class'] = lipid_data[id_col].str.extract(r'^([^ ]*)', expand=False).astype('category')
+    
+    return lipid_data, beige_cols, white_cols
+
+
+def top_k_positions(values, k):
+    """Return positions of the k largest entries of values, in no particular order.
+
+    Ties at the cut-off go to the earliest positions, matching nlargest(keep='first').
+    """
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= len(values):
+        return np.arange(len(values))
+    kth = np.partition(values, -k)[-k]
+    above = np.flatnonzero(values > kth)
+    tied = np.flatnonzero(values == kth)[:k - len(above)]
+    return np.concatenate([above, tied])
+
+
+@st.cache_resource(max_entries=8)
+def build_sankey_fig(source_idx: tuple, target_idx: tuple, value: tuple, labels: tuple, colors: tuple):
+    """Build the Sankey figure; cached as a shared resource, so callers must not mutate it."""
+    fig = go.Figure(data=[go.Sankey(
+        node=dict(
+            pad=15,
+            thickness=20,
+            line=dict(color='black', width=0.5),
+            label=list(labels),
+            color=list(colors)
+        ),
+        link=dict(
+            source=list(source_idx),
+            target=list(target_idx),
+            value=list(value)
+        )
+    )])
+    
+    fig.update_layout(
+        title='Lipid-Gene Sankey: White vs Beige Adipocytes',
+        font=dict(size=12),
+        width=1400,
+        height=900
+    )
+    
+    return fig
+
+
+@st.fragment
+def render_sankey(transcriptome, lipid_data, gene_id_col, thresholds, data_key):
+    """Filter, build and display the Sankey diagram and its exports.
+
+    Runs as a fragment so that clicking Generate or a download button only
+    reruns this section; results persist in session_state until the data or
+    thresholds change.
+    """
+    gene_fc_threshold, lipid_fc_threshold, top_genes_count = thresholds
+    results_key = (data_key, thresholds)
     
     if st.button("Generate Sankey Diagram", type="primary"):
-        with st.spinner("Computing fold changes..."):
-            # Process genes
-            for col in beige_gene_cols + white_gene_cols:
-                transcriptome[col] = pd.to_numeric(transcriptome[col], errors='coerce')
-            
-            transcriptome['Beige_Mean'] = transcriptome[beige_gene_cols].mean(axis=1)
-            transcriptome['White_Mean'] = transcriptome[white_gene_cols].mean(axis=1)
-            transcriptome['Gene_log2FC'] = np.log2((transcriptome['White_Mean'] + 1) / (transcriptome['Beige_Mean'] + 1))
-            
-            # Process lipids
-            for col in beige_lipid_cols + white_lipid_cols:
-                lipid_data[col] = pd.to_numeric(lipid_data[col], errors='coerce')
-            
-            lipid_data['Beige_Mean'] = lipid_data[beige_lipid_cols].mean(axis=1)
-            lipid_data['White_Mean'] = lipid_data[white_lipid_cols].mean(axis=1)
-            lipid_data['Lipid_log2FC'] = np.log2((lipid_data['White_Mean'] + 1) / (lipid_data['Beige_Mean'] + 1))
-            lipid_data['Lipid_Class'] = lipid_data[lipid_id_col].str.split(' ').str[0]
-            
+        with st.spinner("Building Sankey diagram..."):
             # Filter significant changes
-            sig_genes = transcriptome[abs(transcriptome['Gene_log2FC']) > gene_fc_threshold].copy()
-            sig_lipids = lipid_data[abs(lipid_data['Lipid_log2FC']) > lipid_fc_threshold].copy()
+            sig_genes = transcriptome.loc[
+                np.abs(transcriptome['Gene_log2FC'].to_numpy()) > gene_fc_threshold,
+                [gene_id_col, 'Gene_log2FC']
+            ].copy()
+            sig_lipids = lipid_data.loc[
+                np.abs(lipid_data['Lipid_log2FC'].to_numpy()) > lipid_fc_threshold,
+                ['Lipid_Class', 'Lipid_log2FC']
+            ].copy()
             
-            sig_genes['Direction'] = sig_genes['Gene_log2FC'].apply(lambda x: 'Upregulated_White' if x > 0 else 'Downregulated_White')
-            sig_lipids['Direction'] = sig_lipids['Lipid_log2FC'].apply(lambda x: 'Upregulated_White' if x > 0 else 'Downregulated_White')
+            sig_genes['Direction'] = np.where(sig_genes['Gene_log2FC'].to_numpy() > 0, 'Upregulated_White', 'Downregulated_White')
+            sig_lipids['Direction'] = np.where(sig_lipids['Lipid_log2FC'].to_numpy() > 0, 'Upregulated_White', 'Downregulated_White')
             
             # Select top genes
             genes_per_direction = top_genes_count // 2
-            top_genes_up = sig_genes[sig_genes['Direction'] == 'Upregulated_White'].nlargest(genes_per_direction, 'Gene_log2FC')
-            top_genes_down = sig_genes[sig_genes['Direction'] == 'Downregulated_White'].nsmallest(genes_per_direction, 'Gene_log2FC')
-            top_genes = pd.concat([top_genes_up, top_genes_down])
+            sig_gene_fc = sig_genes['Gene_log2FC'].to_numpy()
+            up_pos = np.flatnonzero(sig_gene_fc > 0)
+            down_pos = np.flatnonzero(sig_gene_fc < 0)
+            up_pos = up_pos[top_k_positions(sig_gene_fc[up_pos], genes_per_direction)]
+            down_pos = down_pos[top_k_positions(-sig_gene_fc[down_pos], genes_per_direction)]
+            top_genes = sig_genes.iloc[np.concatenate([up_pos, down_pos])]
             
             # Build flows
-            flows = []
-            for _, row in sig_lipids.iterrows():
-                flows.append({'source': row['Lipid_Class'], 'target': row['Direction'], 'value': 1})
+            lipid_flows = pd.DataFrame({
+                'source': sig_lipids['Lipid_Class'].to_numpy(),
+                'target': sig_lipids['Direction'].to_numpy(),
+                'value': np.ones(len(sig_lipids))
+            })
+            gene_flows = pd.DataFrame({
+                'source': top_genes['Direction'].to_numpy(),
+                'target': top_genes[gene_id_col].to_numpy(),
+                'value': np.abs(top_genes['Gene_log2FC'].to_numpy())
+            })
             
-            for _, row in top_genes.iterrows():
-                flows.append({'source': row['Direction'], 'target': row[gene_id_col], 'value': abs(row['Gene_log2FC'])})
+            flows_df = pd.concat([lipid_flows, gene_flows], ignore_index=True)
+            # Drop flows with a missing endpoint, as groupby did; factorize would code them -1
+            flows_df = flows_df[flows_df['source'].notna() & flows_df['target'].notna()]
             
-            flows_df = pd.DataFrame(flows)
-            flows_agg = flows_df.groupby(['source', 'target'])['value'].sum().reset_index()
+            # Create nodes and aggregate flows per (source, target) pair
+            n_flows = len(flows_df)
+            codes, flow_labels = pd.factorize(pd.concat([flows_df['source'], flows_df['target']]), sort=False)
+            n_nodes = len(flow_labels)
+            pair_key = codes[:n_flows].astype(np.int64) * n_nodes + codes[n_flows:]
+            # Compress keys to the pairs that occur so memory stays O(flows), not O(nodes^2)
+            pair_keys, pair_inv = np.unique(pair_key, return_inverse=True)
+            pair_sums = np.bincount(pair_inv, weights=flows_df['value'].to_numpy(np.float64), minlength=len(pair_keys))
+            pair_src, pair_tgt = np.divmod(pair_keys, n_nodes)
             
-            # Create nodes
-            all_nodes = list(pd.concat([flows_agg['source'], flows_agg['target']]).unique())
-            node_dict = {node: idx for idx, node in enumerate(all_nodes)}
+            flows_agg = pd.DataFrame({
+                'source': flow_labels[pair_src],
+                'target': flow_labels[pair_tgt],
+                'value': pair_sums
+            }).sort_values(['source', 'target'], ignore_index=True)
             
-            flows_agg['source_idx'] = flows_agg['source'].map(node_dict)
-            flows_agg['target_idx'] = flows_agg['target'].map(node_dict)
+            # Number nodes in order of first appearance in the sorted flows
+            n_links = len(flows_agg)
+            node_codes, node_index = pd.factorize(pd.concat([flows_agg['source'], flows_agg['target']]), sort=False)
+            all_nodes = list(node_index)
+            source_idx = node_codes[:n_links]
+            target_idx = node_codes[n_links:]
+            link_value = flows_agg['value'].to_numpy()
+            flows_agg['source_idx'] = source_idx
+            flows_agg['target_idx'] = target_idx
             
             # Node colors
-            node_colors = []
-            for node in all_nodes:
-                if 'Upregulated' in node:
-                    node_colors.append('rgba(255, 99, 71, 0.8)')
-                elif 'Downregulated' in node:
-                    node_colors.append('rgba(70, 130, 180, 0.8)')
-                elif node in ['PC', 'LPC', 'PE', 'LPE']:
-                    node_colors.append('rgba(255, 165, 0, 0.8)')
-                elif node in ['DG', 'TG']:
-                    node_colors.append('rgba(34, 139, 34, 0.8)')
-                elif node in ['SM', 'CAR']:
-                    node_colors.append('rgba(148, 0, 211, 0.8)')
-                else:
-                    node_colors.append('rgba(128, 128, 128, 0.8)')
+            node_colors = [DIR_COLOR[n] if n in DIR_COLOR else CLASS_COLOR.get(n, DEFAULT_NODE_COLOR) for n in all_nodes]
             
             # Create Sankey
-            fig = go.Figure(data=[go.Sankey(
-                node=dict(
-                    pad=15,
-                    thickness=20,
-                    line=dict(color='black', width=0.5),
-                    label=all_nodes,
-                    color=node_colors
-                ),
-                link=dict(
-                    source=flows_agg['source_idx'],
-                    target=flows_agg['target_idx'],
-                    value=flows_agg['value']
-                )
-            )])
-            
-            fig.update_layout(
-                title='Lipid-Gene Sankey: White vs Beige Adipocytes',
-                font=dict(size=12),
-                width=1400,
-                height=900
+            fig = build_sankey_fig(
+                tuple(source_idx.tolist()), tuple(target_idx.tolist()), tuple(link_value.tolist()),
+                tuple(all_nodes), tuple(node_colors)
             )
             
-            st.plotly_chart(fig, width='stretch')
-            
             # Summary statistics
-            st.header("Analysis Summary")
+            # Significant rows have |log2FC| above a positive threshold, so none are zero
+            genes_up = int(np.count_nonzero(sig_gene_fc > 0))
+            lipids_up = int(np.count_nonzero(sig_lipids['Lipid_log2FC'].to_numpy() > 0))
             summary = {
                 'Total_Genes': len(transcriptome),
                 'Significant_Genes': len(sig_genes),
-                'Genes_Up_White': len(sig_genes[sig_genes['Gene_log2FC'] > 0]),
-                'Genes_Down_White': len(sig_genes[sig_genes['Gene_log2FC'] < 0]),
+                'Genes_Up_White': genes_up,
+                'Genes_Down_White': len(sig_genes) - genes_up,
                 'Total_Lipids': len(lipid_data),
                 'Significant_Lipids': len(sig_lipids),
-                'Lipids_Up_White': len(sig_lipids[sig_lipids['Lipid_log2FC'] > 0]),
-                'Lipids_Down_White': len(sig_lipids[sig_lipids['Lipid_log2FC'] < 0])
+                'Lipids_Up_White': lipids_up,
+                'Lipids_Down_White': len(sig_lipids) - lipids_up
             }
             summary_df = pd.DataFrame([summary]).T
             summary_df.columns = ['Count']
-            st.dataframe(summary_df)
-            
-            # Export options
-            st.header("Export Results")
-            
-            col1, col2 = st.columns(2)
             
-            with col1:
-                # HTML export - use to_html() method which returns string
-                html_str = fig.to_html()
-                st.download_button(
-                    label="Download Sankey (HTML)",
-                    data=html_str,
-                    file_name="lipid_gene_sankey.html",
-                    mime="text/html"
-                )
+            # HTML export - reference plotly.js from the CDN instead of inlining it
+            html_str = fig.to_html(include_plotlyjs='cdn', full_html=True)
             
-            with col2:
-                # CSV export
-                csv_buffer = BytesIO()
-                summary_df.to_csv(csv_buffer)
-                csv_buffer.seek(0)
-                st.download_button(
-                    label="Download Summary (CSV)",
-                    data=csv_buffer,
-                    file_name="sankey_summary.csv",
-                    mime="text/csv"
-                )
+            # CSV exports
+            summary_csv = summary_df.to_csv(index=True)
+            flows_csv = flows_agg.to_csv(index=False)
             
-            # Export flows
-            flows_csv = BytesIO()
-            flows_agg.to_csv(flows_csv, index=False)
-            flows_csv.seek(0)
+            st.session_state['sankey_results'] = {
+                'key': results_key,
+                'fig': fig,
+                'html_str': html_str,
+                'summary_csv': summary_csv,
+                'flows_csv': flows_csv,
+                'summary_df': summary_df
+            }
+    
+    results = st.session_state.get('sankey_results')
+    if results is not None and results['key'] == results_key:
+        fig = results['fig']
+        summary_df = results['summary_df']
+        html_str = results['html_str']
+        summary_csv = results['summary_csv']
+        flows_csv = results['flows_csv']
+        
+        st.plotly_chart(fig, width='stretch')
+        
+        st.header("Analysis Summary")
+        st.dataframe(summary_df)
+        
+        # Export options
+        st.header("Export Results")
+        
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            # HTML export
+            st.download_button(
+                label="Download Sankey (HTML)",
+                data=html_str,
+                file_name="lipid_gene_sankey.html",
+                mime="text/html"
+            )
+        
+        with col2:
+            # CSV export
             st.download_button(
-                label="Download Flow Data (CSV)",
-                data=flows_csv,
-                file_name="sankey_flows.csv",
+                label="Download Summary (CSV)",
+                data=summary_csv,
+                file_name="sankey_summary.csv",
                 mime="text/csv"
             )
+        
+        # Export flows
+        st.download_button(
+            label="Download Flow Data (CSV)",
+            data=flows_csv,
+            file_name="sankey_flows.csv",
+            mime="text/csv"
+        )
+
+
+st.title("Lipid-Gene Sankey Diagram Generator")
+st.markdown("**White vs Beige Adipocyte Analysis**")
+
+# Sidebar for file uploads
+st.sidebar.header("Upload Data Files")
+
+transcriptome_file = st.sidebar.file_uploader("Upload Transcriptome CSV", type=['csv'])
+lipid_file = st.sidebar.file_uploader("Upload Lipid Data CSV", type=['csv'])
+
+# Parameters
+st.sidebar.header("Analysis Parameters")
+gene_fc_threshold = st.sidebar.slider("Gene log2FC Threshold", 0.5, 3.0, 1.5, 0.1)
+lipid_fc_threshold = st.sidebar.slider("Lipid log2FC Threshold", 0.1, 2.0, 0.8, 0.1)
+top_genes_count = st.sidebar.slider("Top Genes to Display", 10, 100, 40, 5)
+
+# Column name inputs
+st.sidebar.header("Column Names")
+beige_gene_prefix = st.sidebar.text_input("Beige Gene Column Prefix", "Hannah_Beige_")
+white_gene_prefix = st.sidebar.text_input("White Gene Column Prefix", "Hannah_White_")
+beige_lipid_prefix = st.sidebar.text_input("Beige Lipid Column Prefix", "Beige_")
+white_lipid_prefix = st.sidebar.text_input("White Lipid Column Prefix", "White_")
+gene_id_col = st.sidebar.text_input("Gene ID Column", "SampleID")
+lipid_id_col = st.sidebar.text_input("Lipid ID Column", "Metabolite")
+
+if transcriptome_file and lipid_file:
+    # Load data (cached on file contents and column settings)
+    transcriptome, beige_gene_cols, white_gene_cols = load_transcriptome(
+        transcriptome_file.getvalue(), gene_id_col, beige_gene_prefix, white_gene_prefix
+    )
+    lipid_data, beige_lipid_cols, white_lipid_cols = load_lipids(
+        lipid_file.getvalue(), lipid_id_col, beige_lipid_prefix, white_lipid_prefix
+    )
+    
+    st.success("Files loaded successfully!")
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("Genes", len(transcriptome))
+        st.metric("Beige Gene Samples", len(beige_gene_cols))
+        st.metric("White Gene Samples", len(white_gene_cols))
+    with col2:
+        st.metric("Lipids", len(lipid_data))
+        st.metric("Beige Lipid Samples", len(beige_lipid_cols))
+        st.metric("White Lipid Samples", len(white_lipid_cols))
+    
+    data_key = (
+        transcriptome_file.file_id, lipid_file.file_id, gene_id_col, lipid_id_col,
+        beige_gene_prefix, white_gene_prefix, beige_lipid_prefix, white_lipid_prefix
+    )
+    render_sankey(
+        transcriptome, lipid_data, gene_id_col,
+        (gene_fc_threshold, lipid_fc_threshold, top_genes_count), data_key
+    )
 
 else:
     st.info("Upload both transcriptome and lipid data files to begin analysis")